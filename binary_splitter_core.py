@@ -1,10 +1,293 @@
 # binary_splitter_core.py (Corrected detect_frame_size function)
 import os
 import argparse
+import contextlib
+import ctypes
+import errno
 import json
+import mmap
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
 
+# Size of the blocks copied from the input file while splitting (rounded down to whole frames).
+IO_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Minimum time in seconds between two progress reports.
+PROGRESS_INTERVAL = 0.1
+
+# Amount of copied input after which its pages are dropped from the cache.
+INPUT_RELEASE_SIZE = 64 * 1024 * 1024
+
+# Number of bulks written concurrently while splitting.
+SPLIT_WORKERS = 4
+
+# Size of the chunks copied from each bulk into the reconstructed file.
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Errors meaning an in-kernel copy call cannot be used for the given files; anything else is a real I/O error.
+UNSUPPORTED_COPY_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+# Output files are written through raw descriptors; O_BINARY only exists (and matters) on Windows.
+# O_DIRECT is deliberately not used: bulks are cut at frame boundaries, which are rarely block-aligned.
+WRITE_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _open_for_writing(path):
+    """Opens (or truncates) an output file for writing and returns its file descriptor."""
+    return os.open(path, WRITE_OPEN_FLAGS, 0o644)
+
+
+def _write_all(fd, data):
+    """Writes the whole buffer to fd, retrying on short writes."""
+    # Views are released explicitly so an error cannot leave the caller's mapping exported.
+    with memoryview(data) as view:
+        offset = 0
+        while offset < len(view):
+            with view[offset:] as remaining:
+                offset += os.write(fd, remaining)
+
+
+def _copy_file_range(in_fd, out_fd, offset, count):
+    """Copies count bytes at offset of in_fd to out_fd with copy_file_range(2)."""
+    return os.copy_file_range(in_fd, out_fd, count, offset)
+
+
+def _sendfile(in_fd, out_fd, offset, count):
+    """Copies count bytes at offset of in_fd to out_fd with sendfile(2)."""
+    return os.sendfile(out_fd, in_fd, offset, count)
+
+
+def _kernel_copies():
+    """Returns the in-kernel copy calls available on this platform, preferred first."""
+    kernel_copies = []
+    if hasattr(os, "copy_file_range"):
+        kernel_copies.append(_copy_file_range)
+    if sys.platform.startswith("linux"):
+        kernel_copies.append(_sendfile)
+    return kernel_copies
+
+
+def _copy_block(in_fd, out_fd, offset, count, source, kernel_copies):
+    """
+    Copies up to count bytes at offset of in_fd to the current position of out_fd.
+
+    Uses the first working call in kernel_copies (see _kernel_copies) so the copy runs inside
+    the kernel without holding the GIL, and falls back to writing straight from source (a
+    memoryview of the memory-mapped input). A call that is unsupported for these files, or
+    that copies nothing although the range lies inside the input, is removed from
+    kernel_copies so later blocks of the same operation skip it. Any other error is raised.
+    The position of in_fd is never used, so the same descriptor can serve several threads.
+
+    Returns:
+        int: Number of bytes copied, always more than 0.
+    """
+    for kernel_copy in list(kernel_copies):
+        try:
+            copied = kernel_copy(in_fd, out_fd, offset, count)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_COPY_ERRORS:
+                raise
+            copied = 0
+        if copied:
+            return copied
+        try:
+            kernel_copies.remove(kernel_copy)
+        except ValueError:
+            pass  # Already dropped by another thread
+
+    with source[offset:offset + count] as chunk:
+        if not chunk:
+            raise IOError(f"Input ended at {len(source)} bytes, before offset {offset}.")
+        _write_all(out_fd, chunk)
+        return len(chunk)
+
+
+def _map_input(fd):
+    """Maps a non-empty input file read-only for sequential access."""
+    mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    if hasattr(mapping, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    return mapping
+
+
+def _copy_fd(in_fd, out_fd, count, kernel_copies):
+    """Copies the first count bytes of in_fd to out_fd."""
+    if count <= 0:
+        return
+    with _map_input(in_fd) as mapping, memoryview(mapping) as source:
+        offset = 0
+        while offset < count:
+            offset += _copy_block(in_fd, out_fd, offset, min(count - offset, COPY_CHUNK_SIZE), source, kernel_copies)
+
+
+def _advise(fd, offset, length, advice):
+    """Passes an access-pattern hint to the kernel; a no-op where posix_fadvise is unavailable."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, offset, length, getattr(os, advice))
+
+
+def _prefetch(fd, source, offset, length):
+    """
+    Asks the kernel to start reading a range of the input in the background.
+
+    Uses posix_fadvise on the descriptor where available, and otherwise madvise on the
+    mapping behind source (e.g. on macOS), so the next block is fetched while the
+    current one is being written.
+    """
+    if hasattr(os, "posix_fadvise"):
+        _advise(fd, offset, length, "POSIX_FADV_WILLNEED")
+        return
+
+    mapping = source.obj
+    if offset < len(mapping) and hasattr(mapping, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+        aligned_offset = offset - offset % mmap.PAGESIZE
+        mapping.madvise(mmap.MADV_WILLNEED, aligned_offset, length + offset - aligned_offset)
+
+
+def _load_fallocate():
+    """
+    Returns fallocate(2) from the C library on Linux, or None elsewhere.
+
+    os.posix_fallocate is not used: when the filesystem has no native support, glibc
+    emulates it by writing to every block of the reserved range.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return None
+    for name in ("fallocate64", "fallocate"):
+        fallocate = getattr(libc, name, None)
+        if fallocate is not None:
+            fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+            fallocate.restype = ctypes.c_int
+            return fallocate
+    return None
+
+
+_fallocate = _load_fallocate()
+
+# fallocate(2) mode flag from <linux/falloc.h>: allocate blocks without changing the file size.
+FALLOC_FL_KEEP_SIZE = 1
+
+
+def _preallocate(fd, size):
+    """
+    Reserves size bytes for a new bulk up front so the filesystem does not have to keep extending it.
+
+    The reservation uses FALLOC_FL_KEEP_SIZE, so the visible file size still only grows as data is
+    written and a bulk left behind by a killed split is short rather than padded with zeros.
+    """
+    if _fallocate is None or size <= 0:
+        return
+    while _fallocate(fd, FALLOC_FL_KEEP_SIZE, 0, size) != 0:
+        error = ctypes.get_errno()
+        if error == errno.EINTR:
+            continue
+        if error in (errno.EOPNOTSUPP, errno.ENOSYS):
+            return  # Not supported by this filesystem; the bulk simply grows as it is written
+        raise OSError(error, os.strerror(error))
+
+
+def _release_bulk(fd):
+    """Writes a finished bulk back to disk and asks the kernel to drop its pages from the cache."""
+    if hasattr(os, "posix_fadvise") and hasattr(os, "fdatasync"):
+        # Dirty pages are not dropped, so write the bulk back first.
+        os.fdatasync(fd)
+        _advise(fd, 0, 0, "POSIX_FADV_DONTNEED")
+
+
+def _split_bulk(input_fd, source, kernel_copies, output_filename, start, length, io_block, should_stop, failed_event, report_progress):
+    """
+    Copies length bytes of the input, starting at offset start, into a new bulk file.
+
+    Blocks are copied by offset, so several bulks can be written concurrently from the same
+    input descriptor and mapping. If the copy fails, failed_event is set before the bulk is
+    cleaned up, so the other bulks stop at their next block.
+
+    Returns:
+        bool: False if the copy was stopped before the bulk was complete, True otherwise.
+    """
+    if should_stop():
+        return False
+
+    output_fd = _open_for_writing(output_filename)
+    print(f"Creating bulk file: {output_filename}")
+    written = 0
+    released = 0
+    try:
+        _preallocate(output_fd, length)
+        while written < length:
+            if should_stop():
+                break
+
+            if written - released >= INPUT_RELEASE_SIZE:
+                # The input is read only once, so keep it from crowding other data out of the cache.
+                _advise(input_fd, start + released, written - released, "POSIX_FADV_DONTNEED")
+                released = written
+
+            block_size = min(io_block, length - written)
+
+            # Start reading the next block in the background while this one is copied.
+            _prefetch(input_fd, source, start + written + block_size, io_block)
+
+            copied = _copy_block(input_fd, output_fd, start + written, block_size, source, kernel_copies)
+            written += copied
+            report_progress(copied)
+
+        # Drop any reserved space that was not written, e.g. when the split was stopped.
+        os.ftruncate(output_fd, written)
+        if written == length:
+            # Partial bulks are deleted by the caller, so only complete ones are worth writing back.
+            _release_bulk(output_fd)
+    except BaseException:
+        failed_event.set()
+        # Keep the original error; the partial bulk is deleted by the caller anyway.
+        with contextlib.suppress(OSError):
+            os.ftruncate(output_fd, written)
+        raise
+    finally:
+        os.close(output_fd)
+        if written > released:
+            _advise(input_fd, start + released, written - released, "POSIX_FADV_DONTNEED")
+
+    return written == length
+
+
+def _remove_incomplete_bulks(futures, bulk_paths):
+    """
+    Deletes the first bulk that was not completely written and every bulk after it.
+
+    Bulks are written concurrently, so a stop or an error can leave several partial bulks
+    with gaps between them; keeping only the leading run of complete bulks ensures that
+    reconstructing them still yields a prefix of the input.
+    """
+    for first_incomplete, future in enumerate(futures):
+        if future.cancelled() or future.exception() is not None or not future.result():
+            break
+    else:
+        return
+
+    for bulk_path in bulk_paths[first_incomplete:]:
+        try:
+            os.remove(bulk_path)
+        except FileNotFoundError:
+            pass
+
+
+@lru_cache(maxsize=4)
 def load_config_defaults(config_file_path="config.json"):
-    """Loads default values from a JSON configuration file."""
+    """
+    Loads default values from a JSON configuration file.
+
+    The result is cached per path and returned as a read-only mapping, since it is shared between callers.
+    """
     defaults = {
         "default_frame_size_bytes": 1111,
         "default_bulk_size_gb": 2.0,
@@ -18,53 +301,78 @@ def load_config_defaults(config_file_path="config.json"):
         print(f"Warning: Configuration file '{config_file_path}' not found. Using hardcoded defaults.")
     except json.JSONDecodeError:
         print(f"Warning: Error decoding JSON in '{config_file_path}'. Using hardcoded defaults.")
-    return defaults
+    return MappingProxyType(defaults)
+
+
+@lru_cache(maxsize=16)
+def _sync_word_bytes(sync_word_hex):
+    """Parses and validates a hexadecimal sync word; cached so repeated detections reuse it."""
+    try:
+        sync_word_bytes = bytes.fromhex(sync_word_hex)
+    except ValueError:
+        raise ValueError("Invalid sync word hex format.")
+
+    if not sync_word_bytes:
+        raise ValueError("Sync word cannot be empty.")
 
+    return sync_word_bytes
 
-def detect_frame_size(input_file_path, sync_word_hex, search_chunk_size=4096, max_frame_size_guess=65536):
+
+def detect_frame_size(input_file_path, sync_word_hex, search_chunk_size=1024 * 1024, max_frame_size_guess=65536):
     """
     Attempts to auto-detect frame size from a binary file by searching for a sync word.
 
+    The file is memory-mapped and searched in place, so a sync word is found even when it
+    sits behind a header. All sync word intervals in the search window are collected and
+    the most frequent one is returned, so a sync word pattern occurring by chance inside
+    frame data does not produce a wrong frame size.
+
     Args:
         input_file_path (str): Path to the input binary file.
         sync_word_hex (str): Sync word in hexadecimal format (e.g., "4711").
-        search_chunk_size (int, optional): Chunk size to read from the file for searching. Defaults to 4096 bytes.
+        search_chunk_size (int, optional): Size of the window searched for the first sync word and, from there, for further sync words. Defaults to 1 MiB.
         max_frame_size_guess (int, optional): Maximum reasonable frame size to guess. Defaults to 65536 bytes.
 
     Returns:
         int: Detected frame size in bytes, or None if detection fails.
     """
-    try:
-        sync_word_bytes = bytes.fromhex(sync_word_hex)
-    except ValueError:
-        raise ValueError("Invalid sync word hex format.")
-
-    if not sync_word_bytes:
-        raise ValueError("Sync word cannot be empty.")
+    sync_word_bytes = _sync_word_bytes(sync_word_hex)
 
     try:
         with open(input_file_path, 'rb') as infile:
-            chunk = infile.read(search_chunk_size)
-            first_sync_index = chunk.find(sync_word_bytes)
+            if os.fstat(infile.fileno()).st_size == 0:
+                return None  # Empty files cannot be mapped
 
-            if first_sync_index == -1:
-                return None  # Sync word not found in the initial chunk
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                first_sync_index = mm.find(sync_word_bytes, 0, min(len(mm), search_chunk_size))
 
-            # Seek to just after the first sync word and read another chunk to find the next sync word
-            infile.seek(first_sync_index + len(sync_word_bytes))
-            search_chunk_next = infile.read(max_frame_size_guess) # Limit search to max frame size
-            second_sync_index = search_chunk_next.find(sync_word_bytes)
+                if first_sync_index == -1:
+                    return None  # Sync word not found in the search window
 
-            if second_sync_index == -1:
-                return None # Second sync word not found within max frame size
+                # Collect every sync word position in a window starting at the first one
+                window_end = min(len(mm), first_sync_index + search_chunk_size)
+                sync_positions = [first_sync_index]
+                next_index = mm.find(sync_word_bytes, first_sync_index + len(sync_word_bytes), window_end)
+                while next_index != -1:
+                    sync_positions.append(next_index)
+                    next_index = mm.find(sync_word_bytes, next_index + len(sync_word_bytes), window_end)
 
-            # Corrected frame size calculation: Distance to the start of the second sync word from the *beginning* of the frame.
-            detected_frame_size = second_sync_index + len(sync_word_bytes) # Corrected calculation
+            # Sync word bytes that occur by chance inside frame data only produce scattered
+            # intervals, so the most common plausible interval is the frame size.
+            intervals = Counter(
+                second - first
+                for first, second in zip(sync_positions, sync_positions[1:])
+                if len(sync_word_bytes) < second - first <= max_frame_size_guess
+            )
 
-            if detected_frame_size <= len(sync_word_bytes): # Frame size too small or invalid
-                return None
+            if not intervals:
+                return None # No second sync word found within max frame size
 
-            return detected_frame_size
+            frame_size, occurrences = intervals.most_common(1)[0]
+            if occurrences == 1 and len(intervals) > 1:
+                return None # Several sync words but no repeating interval: matches are not frame-aligned
+
+            return frame_size
 
     except FileNotFoundError:
         raise FileNotFoundError(f"Input file not found: {input_file_path}")
@@ -87,9 +395,16 @@ def split_binary_file(input_file_path, bulk_size_gb, frame_size_bytes, output_pr
         stop_flag (callable, optional): Function that returns True if the operation should stop.
     """
 
+    if frame_size_bytes <= 0:
+        raise ValueError("Frame size must be a positive number of bytes.")
+
     bulk_size_bytes = bulk_size_gb * 1024 * 1024 * 1024
-    bulk_count = 1
-    current_bulk_size = 0
+    # A bulk holds as many whole frames as fit, but never less than one frame.
+    frames_per_bulk = max(1, int(bulk_size_bytes // frame_size_bytes))
+    bulk_limit = frames_per_bulk * frame_size_bytes
+    # Copy in large blocks made of whole frames instead of frame by frame, never larger than a bulk.
+    frames_per_block = min(frames_per_bulk, max(1, IO_BLOCK_SIZE // frame_size_bytes))
+    io_block = frames_per_block * frame_size_bytes
     output_directory = os.path.dirname(input_file_path) if input_file_path else "."
     output_prefix_to_use = output_prefix
 
@@ -98,41 +413,87 @@ def split_binary_file(input_file_path, bulk_size_gb, frame_size_bytes, output_pr
 
     try:
         total_size = os.path.getsize(input_file_path)
+        # Bulk boundaries are known up front, so every bulk can be written independently.
+        partial_frame_size = total_size % frame_size_bytes
+        whole_frames_size = total_size - partial_frame_size
+        bulk_ranges = [(start, min(bulk_limit, whole_frames_size - start)) for start in range(0, whole_frames_size, bulk_limit)]
+        if partial_frame_size:
+            # Like any other frame, a trailing partial frame joins the last bulk if it still fits.
+            if bulk_ranges and bulk_ranges[-1][1] + partial_frame_size <= bulk_size_bytes:
+                start, length = bulk_ranges.pop()
+                bulk_ranges.append((start, length + partial_frame_size))
+            else:
+                bulk_ranges.append((whole_frames_size, partial_frame_size))
         bytes_processed = 0
-
-        with open(input_file_path, 'rb') as infile:
-            output_file = None
-
-            while True:
-                if stop_flag and stop_flag():
-                    print("Split operation stopped.")
-                    if output_file:
-                        output_file.close()
+        last_percentage = -1
+        last_report_time = 0.0
+        progress_lock = threading.Lock()
+        stop_event = threading.Event()
+
+        def should_stop():
+            if not stop_event.is_set() and stop_flag and stop_flag():
+                stop_event.set()
+            return stop_event.is_set()
+
+        def report_progress(copied):
+            nonlocal bytes_processed, last_percentage, last_report_time
+            with progress_lock:
+                bytes_processed += copied
+                if not progress_callback:
                     return
-
-                frame_data = infile.read(frame_size_bytes)
-                if not frame_data:
-                    break
-
-                if output_file is None or current_bulk_size + len(frame_data) > bulk_size_bytes:
-                    if output_file:
-                        output_file.close()
-                    output_filename = os.path.join(output_directory, f"{output_prefix_to_use}_{bulk_count:03d}.bin")
-                    output_file = open(output_filename, 'wb')
-                    print(f"Creating bulk file: {output_filename}")
-                    current_bulk_size = 0
-                    bulk_count += 1
-
-                output_file.write(frame_data)
-                current_bulk_size += len(frame_data)
-                bytes_processed += len(frame_data)
-
-                if progress_callback and total_size > 0:
-                    progress_percentage = int((bytes_processed / total_size) * 100)
+                # Only report changed percentages, at most every PROGRESS_INTERVAL seconds (completion always).
+                progress_percentage = int((bytes_processed / total_size) * 100)
+                now = time.monotonic()
+                if progress_percentage != last_percentage and (
+                        progress_percentage == 100 or now - last_report_time >= PROGRESS_INTERVAL):
                     progress_callback(progress_percentage)
-
-            if output_file:
-                output_file.close()
+                    last_percentage = progress_percentage
+                    last_report_time = now
+
+        # Only the bulk number changes between bulk file names.
+        bulk_path_base = os.path.join(output_directory, output_prefix_to_use) + "_"
+
+        if not bulk_ranges:
+            print("Binary file splitting complete.")  # Empty input: nothing to write (and nothing to map)
+            return
+
+        bulk_paths = [f"{bulk_path_base}{bulk_index + 1:03d}.bin" for bulk_index in range(len(bulk_ranges))]
+
+        with open(input_file_path, 'rb', buffering=0) as infile, _map_input(infile.fileno()) as mapping, \
+                memoryview(mapping) as source, ThreadPoolExecutor(max_workers=min(SPLIT_WORKERS, len(bulk_ranges))) as executor:
+            input_fd = infile.fileno()
+            _advise(input_fd, 0, 0, "POSIX_FADV_SEQUENTIAL")
+            kernel_copies = _kernel_copies()
+            futures = [
+                executor.submit(
+                    _split_bulk,
+                    input_fd,
+                    source,
+                    kernel_copies,
+                    bulk_path,
+                    start,
+                    length,
+                    io_block,
+                    should_stop,
+                    stop_event,
+                    report_progress,
+                )
+                for bulk_path, (start, length) in zip(bulk_paths, bulk_ranges)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Let bulks that are already being written stop early and skip the rest.
+                stop_event.set()
+                executor.shutdown(cancel_futures=True)
+                _remove_incomplete_bulks(futures, bulk_paths)
+                raise
+
+        if stop_event.is_set():
+            _remove_incomplete_bulks(futures, bulk_paths)
+            print("Split operation stopped.")
+            return
 
         print("Binary file splitting complete.")
 
@@ -153,24 +514,33 @@ def reconstruct_binary_file(output_prefix, output_directory, output_file_name="r
         output_file_name (str, optional): Name of the reconstructed output file. Defaults to "reconstructed_file.bin".
     """
     bulk_count = 1
-    reconstructed_data = bytearray()
+    reconstructed_path = os.path.join(output_directory, output_file_name)
+    bulk_path_base = os.path.join(output_directory, output_prefix) + "_"
+    kernel_copies = _kernel_copies()
+    out_fd = None
 
     try:
-        while True:
-            bulk_filename = os.path.join(output_directory, f"{output_prefix}_{bulk_count:03d}.bin")
-            if not os.path.exists(bulk_filename):
-                break
-
-            with open(bulk_filename, 'rb') as bulk_file:
-                bulk_data = bulk_file.read()
-                reconstructed_data.extend(bulk_data)
-                print(f"Reading bulk file: {bulk_filename}")
-            bulk_count += 1
+        try:
+            while True:
+                bulk_filename = f"{bulk_path_base}{bulk_count:03d}.bin"
+                if not os.path.exists(bulk_filename):
+                    break
 
-        if reconstructed_data:
-            reconstructed_path = os.path.join(output_directory, output_file_name)
-            with open(reconstructed_path, 'wb') as outfile:
-                outfile.write(reconstructed_data)
+                if out_fd is None:
+                    out_fd = _open_for_writing(reconstructed_path)
+
+                in_fd = os.open(bulk_filename, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+                try:
+                    print(f"Reading bulk file: {bulk_filename}")
+                    _copy_fd(in_fd, out_fd, os.fstat(in_fd).st_size, kernel_copies)
+                finally:
+                    os.close(in_fd)
+                bulk_count += 1
+        finally:
+            if out_fd is not None:
+                os.close(out_fd)
+
+        if out_fd is not None:
             print(f"Reconstructed file saved as: {reconstructed_path}")
         else:
             print("No bulk files found to reconstruct.")
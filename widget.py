@@ -3,12 +3,11 @@ import os
 from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                                 QLabel, QLineEdit, QPushButton, QFileDialog,
                                 QProgressBar, QCheckBox, QMessageBox)
-from PySide6.QtCore import Slot, QThread, Signal
+from PySide6.QtCore import Slot, QThread, Signal, QTimer
 from binary_splitter_core import split_binary_file, load_config_defaults, detect_frame_size
 
 # --- Worker Thread Class (Split Only) ---
 class FileSplitterWorker(QThread):
-    progress_signal = Signal(int)
     finished_signal = Signal(str)
     error_signal = Signal(str)
     stop_signal = Signal()
@@ -23,6 +22,7 @@ class FileSplitterWorker(QThread):
         self.auto_detect_frame_size = auto_detect_frame_size
         self.sync_word_hex = sync_word_hex
         self._is_stopped = False
+        self.progress = 0 # Latest progress percentage, polled by the UI instead of signalled
 
     def run(self):
         try:
@@ -41,7 +41,7 @@ class FileSplitterWorker(QThread):
                 self.bulk_size_gb,
                 frame_size_to_use,
                 self.output_prefix,
-                progress_callback=self.progress_signal.emit,
+                progress_callback=self._set_progress,
                 stop_flag=lambda: self._is_stopped
             )
             self.finished_signal.emit("File splitting complete.")
@@ -50,6 +50,9 @@ class FileSplitterWorker(QThread):
         finally:
             pass
 
+    def _set_progress(self, percentage):
+        self.progress = percentage
+
     def stop_operation(self):
         self._is_stopped = True
         self.stop_signal.emit()
@@ -144,6 +147,11 @@ class FileSplitterUI(QWidget):
         self.setLayout(main_layout)
         self.worker_thread = None
 
+        # Poll the worker's progress instead of receiving a cross-thread signal per update
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(100)
+        self.progress_timer.timeout.connect(self.update_progress)
+
 
     @Slot()
     def browse_file(self):
@@ -187,11 +195,11 @@ class FileSplitterUI(QWidget):
             self.stop_button.setEnabled(True)
 
             self.worker_thread = FileSplitterWorker(input_file, bulk_size_gb, frame_size_bytes, output_prefix, auto_detect_frame_size, sync_word_hex)
-            self.worker_thread.progress_signal.connect(self.update_progress)
             self.worker_thread.finished_signal.connect(self.operation_finished)
             self.worker_thread.error_signal.connect(self.operation_error)
             self.worker_thread.frame_size_detected_signal.connect(self.update_frame_size_field) # Connect new signal
             self.worker_thread.start()
+            self.progress_timer.start()
 
 
         except ValueError as e:
@@ -211,12 +219,15 @@ class FileSplitterUI(QWidget):
             self.worker_thread.stop_operation()
 
 
-    @Slot(int)
-    def update_progress(self, progress):
-        self.progress_bar.setValue(progress)
+    @Slot()
+    def update_progress(self):
+        if self.worker_thread:
+            self.progress_bar.setValue(self.worker_thread.progress)
 
     @Slot(str)
     def operation_finished(self, message):
+        self.progress_timer.stop()
+        self.update_progress() # Show the final value the timer may have missed
         self.status_label.setText(message)
         self.split_button.setEnabled(True)
         self.stop_button.setEnabled(False)
@@ -224,6 +235,7 @@ class FileSplitterUI(QWidget):
 
     @Slot(str)
     def operation_error(self, error_message):
+        self.progress_timer.stop()
         QMessageBox.critical(self, "Error", f"An error occurred: {error_message}")
         self.status_label.setText(f"Error: {error_message}")
         self.progress_bar.setValue(0)